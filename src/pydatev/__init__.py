@@ -1 +1,2 @@
 from .pydatev import *
+from .pydatev import __getattr__
@@ -6,84 +6,569 @@
 #
 
 import os
+import csv
+import io
 import datetime 
-from collections import UserDict
+import types
+from collections import namedtuple
+from itertools import repeat
+from collections.abc import MutableMapping
 import pickle
-import pkg_resources
+import json
+import weakref
 try:
-    import pandas as pd
-except ImportError:
-    pass
+    from importlib.resources import files as _resource_files
+except ImportError: #Python < 3.9
+    _resource_files = None
+
+#pandas takes longer to import than the rest of this module, so it is only imported by the functions that need it, see _import_pandas().
+pd = None
 
 class DatevFormatError(ValueError):
     '''Error for everything that conflicts with the DATEV file format specifications.'''
     pass
 
-with pkg_resources.resource_stream(__name__, "format-specifications.dat") as f:
-    specifications = pickle.load(f)
+_specifications = None
+
+def get_specifications():
+    '''Return the DATEV file format specifications. They are loaded from the package data when they are needed for the first time.'''
+    global _specifications
+    if _specifications is None:
+        if _resource_files is None:
+            import pkg_resources
+            f = pkg_resources.resource_stream(__name__, "format-specifications.dat")
+        else:
+            f = _resource_files(__package__).joinpath("format-specifications.dat").open('rb')
+        with f:
+            _specifications = pickle.load(f)
+    return _specifications
+
+def _import_pandas():
+    '''Import pandas as the module attribute pd, if this has not happened yet.'''
+    global pd
+    if pd is None:
+        try:
+            import pandas
+        except ImportError:
+            raise RuntimeError("You need to install the python module 'pandas' to use this function.")
+        pd = pandas
+    return pd
+
+def __getattr__(name):
+    '''Keep the module attribute 'specifications' available (PEP 562).'''
+    if name == 'specifications':
+        return get_specifications()
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+
+#The properties of a field that are needed to check, serialize and parse its values, converted once from the dict in the specifications.
+_Field = namedtuple('_Field', ['label', 'alias', 'format_type', 'length', 'decimal_places', 'max_length', 'necessary', 'format_expression'])
+
+def _compile_field(field):
+    '''Convert a field dict from the specifications to a _Field.'''
+    format_type = field['FormatType']
+    length = -1 if field['Length'] is None else int(field['Length'])
+    decimal_places = int(field['DecimalPlaces'])
+    max_length = length + 1 + decimal_places if format_type in ['Betrag','Zahl'] else length
+    return _Field(field['Label'], field.get('LabelAlias'), format_type, length, decimal_places, max_length, int(field['Necessary']) == 1, field.get('FormatExpression'))
+
+#Functions to check, serialize and parse the values of the different FormatTypes. They are selected once per field by _Schema, DatevEntry calls them directly without comparing the FormatType again.
+
+#The checks compare the exact type first, which is the common case, and only fall back to isinstance() for subclasses.
+
+def _check_float(key, value):
+    if not type(value) is float and not isinstance(value, float):
+        raise DatevFormatError("The value for key '{}' needs to be of type float.".format(key))
+
+def _check_date(key, value):
+    if not type(value) is datetime.date: #Check with type(), because isinstance() would also accept datetime.datetime.
+        raise DatevFormatError("The value for key '{}' needs to be of type datetime.date.".format(key))
+
+def _check_konto(key, value):
+    if not (type(value) is str and value.isdigit()):
+        if not isinstance(value, str):
+            raise DatevFormatError("The value for key '{}' needs to be of type str.".format(key))
+        if not value.isdigit():
+            raise DatevFormatError("The value for key '{}' needs to be a string of digits.".format(key))
+
+def _check_text(key, value):
+    if not type(value) is str and not isinstance(value, str):
+        raise DatevFormatError("The value for key '{}' needs to be of type str.".format(key))
+    if '"' in value:
+        raise DatevFormatError("The value for key '{}' should not contain quotation marks.".format(key))
+
+def _check_int(key, value):
+    if not type(value) is int and not isinstance(value, int):
+        raise DatevFormatError("The value for key '{}' needs to be of type int.".format(key))
+
+def _check_timestamp(key, value):
+    if not type(value) is datetime.datetime and not isinstance(value, datetime.datetime):
+        raise DatevFormatError("The value for key '{}' needs to be of type datetime.datetime.".format(key))
+
+def _write_number(value, decimal_places):
+    if decimal_places == 2 and value.is_integer() and value != 0: #whole amounts are common and don't need float formatting
+        return f'{int(value)},00'
+    return f'{value:.{decimal_places}f}'.replace('.',',')
+
+def _write_int(value, decimal_places):
+    return '%d' % value
+
+def _write_date_ttmm(value, decimal_places):
+    return f'{value.day:02d}{value.month:02d}'
+
+def _write_date_ttmmjjjj(value, decimal_places):
+    return f'{value.day:02d}{value.month:02d}{value.year:04d}'
+
+def _write_date_jjjjmmtt(value, decimal_places):
+    return f'{value.year:04d}{value.month:02d}{value.day:02d}'
+
+def _write_konto(value, decimal_places):
+    return value
+
+def _write_text(value, decimal_places):
+    return '"' + value + '"'
+
+def _write_timestamp(value, decimal_places):
+    return f'{value.year:04d}{value.month:02d}{value.day:02d}{value.hour:02d}{value.minute:02d}{value.second:02d}{value.microsecond:03d}'
+
+#Column kernels for the write functions, the counterpart of the column kernels for reading below. None becomes the empty string of the FormatType.
+
+def _write_number_column(values, decimal_places):
+    return ['' if v is None else f'{v:.{decimal_places}f}'.replace('.',',') for v in values]
+
+def _write_int_column(values, decimal_places):
+    return ['' if v is None else '%d' % v for v in values]
+
+def _write_date_ttmm_column(values, decimal_places):
+    return ['' if v is None else f'{v.day:02d}{v.month:02d}' for v in values]
+
+def _write_date_ttmmjjjj_column(values, decimal_places):
+    return ['' if v is None else f'{v.day:02d}{v.month:02d}{v.year:04d}' for v in values]
+
+def _write_date_jjjjmmtt_column(values, decimal_places):
+    return ['' if v is None else f'{v.year:04d}{v.month:02d}{v.day:02d}' for v in values]
+
+def _write_konto_column(values, decimal_places):
+    return ['' if v is None else v for v in values]
+
+def _write_text_column(values, decimal_places):
+    return ['""' if v is None else '"' + v + '"' for v in values]
+
+#write function -> column kernel
+_column_writers = {
+    _write_number:          _write_number_column,
+    _write_int:             _write_int_column,
+    _write_date_ttmm:       _write_date_ttmm_column,
+    _write_date_ttmmjjjj:   _write_date_ttmmjjjj_column,
+    _write_date_jjjjmmtt:   _write_date_jjjjmmtt_column,
+    _write_konto:           _write_konto_column,
+    _write_text:            _write_text_column,
+    }
+
+def _read_float(string, year):
+    return float(string.replace(',', '.'))
+
+def _read_int(string, year):
+    return int(string)
+
+#The dates are converted with one int() and integer arithmetic instead of one int() per slice.
+
+def _read_date_ttmm(string, year):
+    d = int(string)
+    return datetime.date(year, d % 100, d // 100)
+
+def _read_date_ttmmjjjj(string, year):
+    if len(string) != 8:
+        raise NotImplementedError("Unknown date format.")
+    d = int(string)
+    return datetime.date(d % 10000, d // 10000 % 100, d // 1000000)
+
+def _read_date_jjjjmmtt(string, year):
+    d = int(string)
+    return datetime.date(d // 10000, d // 100 % 100, d % 100)
+
+def _read_konto(string, year):
+    return string
+
+def _read_text(string, year):
+    return string.replace('"','') if '"' in string else string
+
+def _read_timestamp(string, year):
+    if len(string) != 17:
+        return datetime.datetime(int(string[:4]),int(string[4:6]),int(string[6:8]),int(string[8:10]),int(string[10:12]),int(string[12:14]),int(string[14:17]))
+    t = int(string)
+    return datetime.datetime(t // 10000000000000, t // 100000000000 % 100, t // 1000000000 % 100, t // 10000000 % 100, t // 100000 % 100, t // 1000 % 100, t % 1000)
 
+#Column kernels for the most common read functions. They convert a whole column of strings in one list comprehension, without a function call per value, and check the values on the way. The empty strings '' and '""' become None.
 
-class DatevEntry(UserDict):
+def _read_float_column(key, strings, year):
+    return [None if not s or s == '""' else float(s.replace(',', '.')) for s in strings]
+
+def _read_int_column(key, strings, year):
+    return [None if not s or s == '""' else int(s) for s in strings]
+
+#Dates, account numbers and texts repeat a lot within a column, so these kernels convert each distinct string once and share the resulting object between all entries.
+
+def _read_date_ttmm_column(key, strings, year):
+    date = datetime.date
+    dates = {}
+    for s in set(strings):
+        if s and s != '""':
+            d = int(s)
+            dates[s] = date(year, d % 100, d // 100)
+    return [dates.get(s) for s in strings]
+
+def _read_date_ttmmjjjj_column(key, strings, year):
+    date = datetime.date
+    dates = {}
+    for s in set(strings):
+        if s and s != '""':
+            if len(s) != 8:
+                raise NotImplementedError("Unknown date format.")
+            d = int(s)
+            dates[s] = date(d % 10000, d // 10000 % 100, d // 1000000)
+    return [dates.get(s) for s in strings]
+
+def _read_date_jjjjmmtt_column(key, strings, year):
+    date = datetime.date
+    dates = {}
+    for s in set(strings):
+        if s and s != '""':
+            d = int(s)
+            dates[s] = date(d // 10000, d // 100 % 100, d % 100)
+    return [dates.get(s) for s in strings]
+
+def _read_konto_column(key, strings, year):
+    pool = {}
+    for s in set(strings):
+        if s and s != '""':
+            if not s.isdigit():
+                raise DatevFormatError("The value for key '{}' needs to be a string of digits.".format(key))
+            pool[s] = s
+    return [pool.get(s) for s in strings]
+
+def _read_text_column(key, strings, year):
+    pool = {}
+    for s in set(strings):
+        if s and s != '""':
+            pool[s] = s.replace('"','') if '"' in s else s
+    return [pool.get(s) for s in strings]
+
+#read function -> column kernel
+_column_readers = {
+    _read_float:            _read_float_column,
+    _read_int:              _read_int_column,
+    _read_date_ttmm:        _read_date_ttmm_column,
+    _read_date_ttmmjjjj:    _read_date_ttmmjjjj_column,
+    _read_date_jjjjmmtt:    _read_date_jjjjmmtt_column,
+    _read_konto:            _read_konto_column,
+    _read_text:             _read_text_column,
+    }
+
+#FormatType -> (check, write, read)
+_format_handlers = {
+    'Betrag':           (_check_float, _write_number, _read_float),
+    'Datum':            (_check_date, _write_date_ttmmjjjj, _read_date_ttmmjjjj),
+    'Datum JJJJMMTT':   (_check_date, _write_date_jjjjmmtt, _read_date_jjjjmmtt),
+    'Konto':            (_check_konto, _write_konto, _read_konto),
+    'Text':             (_check_text, _write_text, _read_text),
+    'Zahl':             (_check_int, _write_int, _read_int),
+    'Zeitstempel':      (_check_timestamp, _write_timestamp, _read_timestamp),
+    }
+
+def _select_handlers(field):
+    '''Return the functions (check, write, read) for the values of a _Field.'''
+    format_type = field.format_type
+    length = field.length
+    if format_type == 'Datum' and (length == 4 or field.format_expression == 'TTMM'):
+        return _check_date, _write_date_ttmm, _read_date_ttmm
+    elif format_type == 'Datum' and length != 8:
+        def unknown_date_format(*args):
+            raise NotImplementedError("Unknown date format.")
+        return _check_date, unknown_date_format, unknown_date_format
+    elif format_type == 'Zahl' and field.decimal_places > 0:
+        return _check_float, _write_number, _read_float
+    elif format_type in _format_handlers:
+        return _format_handlers[format_type]
+    else:
+        def unknown_format_type(*args):
+            raise NotImplementedError("Unknown FormatType: {}".format(format_type))
+        return unknown_format_type, unknown_format_type, unknown_format_type
+
+
+class _Schema(object):
+    '''The field specifications of a data category in the form needed by DatevEntry. The tables are built once per list of fields and shared by all entries.'''
+    
+    def __init__(self, fields):
+        self.fields = fields
+        self.compiled = tuple(_compile_field(f) for f in fields)
+        self.labels = tuple(f.label for f in self.compiled)
+        self.aliases = dict([(f.alias,f.label) for f in self.compiled if not f.alias is None])
+        self.required_keys = tuple(f.label for f in self.compiled if f.necessary)
+        #labels without duplicates, each of them has one column in a _ColumnStore
+        self.keys = tuple(dict.fromkeys(self.labels))
+        self.index = dict([(label,i) for i,label in enumerate(self.keys)])
+        #label or alias -> (label, index, check function)
+        self.field_info = {}
+        #per field in file order, for self.serialize_values() and self.parse_columns()
+        serializers = []
+        parsers = []
+        #fields with the same label share one column, so they all use the handlers of the last of them, like self.field_info
+        last = dict([(f.label,f) for f in self.compiled])
+        for f in self.compiled:
+            f = last[f.label]
+            check, write, read = _select_handlers(f)
+            self.field_info[f.label] = (f.label, self.index[f.label], check)
+            empty, quotes = ('""', 2) if f.format_type == 'Text' else ('', 0)
+            serializers.append((f.label, self.index[f.label], empty, quotes, f.decimal_places, f.max_length if f.length > 0 else -1, write))
+            parsers.append((f.label, self.index[f.label], check, read))
+        self.serializers = tuple(serializers)
+        self.parsers = tuple(parsers)
+        #label -> the same tuples, for DatevEntry.python2datev() and DatevEntry.datev2python()
+        self.serializer = dict([(t[0],t) for t in self.serializers])
+        self.parser = dict([(t[0],t) for t in self.parsers])
+        for alias, label in self.aliases.items():
+            self.field_info[alias] = self.field_info[label]
+    
+    def serialize_values(self, values):
+        '''Convert the values of one entry, given in the order of self.keys, to a line of a DATEV file.'''
+        parts = []
+        append = parts.append
+        for key, index, empty, quotes, decimal_places, max_length, write in self.serializers:
+            value = values[index]
+            if value is None:
+                append(empty)
+                continue
+            s = write(value, decimal_places)
+            if max_length >= 0 and len(s) - quotes > max_length:
+                raise DatevFormatError("The value {} has {} characters, but the DATEV file specification allows only {} characters for values at key {}.".format(s, len(s), max_length, key))
+            append(s)
+        return ';'.join(parts)
+    
+    def serialize_columns(self, columns, size):
+        '''Convert columns like the ones of a _ColumnStore to one list of DATEV strings per field, in the order of the fields. Columns that are None are returned as itertools.repeat objects.'''
+        string_columns = []
+        for key, index, empty, quotes, decimal_places, max_length, write in self.serializers:
+            values = columns[index]
+            if values is None:
+                string_columns.append(repeat(empty, size))
+                continue
+            write_column = _column_writers.get(write)
+            if write_column is None:
+                strings = [empty if v is None else write(v, decimal_places) for v in values]
+            else:
+                strings = write_column(values, decimal_places)
+            if max_length >= 0 and size > 0 and max(map(len, strings)) - quotes > max_length:
+                s = next(s for s in strings if len(s) - quotes > max_length)
+                raise DatevFormatError("The value {} has {} characters, but the DATEV file specification allows only {} characters for values at key {}.".format(s, len(s), max_length, key))
+            string_columns.append(strings)
+        return string_columns
+    
+    def parse_columns(self, string_columns, year = None):
+        '''Convert the strings of a DATEV file, given column by column in the order of the fields, to python values. Returns one list of values per key, or None for keys without any value.'''
+        columns = [None] * len(self.keys)
+        for parser, strings in zip(self.parsers, string_columns):
+            columns[parser[1]] = _parse_strings(parser, strings, year)
+        return columns
+
+def _parse_strings(parser, strings, year = None):
+    '''Convert the strings of one column of a DATEV file with a parser tuple of a _Schema. Returns a list of values, or None if all of them are empty.'''
+    key, index, check, read = parser
+    if strings.count('') + strings.count('""') == len(strings): #most columns of a DATEV file are empty
+        return None
+    read_column = _column_readers.get(read)
+    if not read_column is None:
+        return read_column(key, strings, year)
+    values = [read(string, year) if string and string != '""' else None for string in strings]
+    if values.count(None) == len(values):
+        return None
+    for value in values:
+        if not value is None:
+            check(key, value)
+    return values
+
+#schemas of the lists of fields in the specifications, which exist as long as the module
+_schemas = {}
+#schemas of other lists of fields, only as long as they are used, so that they are freed together with their lists
+_other_schemas = weakref.WeakValueDictionary()
+_specification_keys = None
+
+def _specification_key(fields):
+    '''Return (category_type, version) if fields is the list of fields of a data category in the specifications, otherwise None.'''
+    global _specification_keys
+    if _specification_keys is None:
+        _specification_keys = dict([(id(v['Field']),(category_type, version)) for category_type, versions in get_specifications().items() for version, v in versions.items()])
+    return _specification_keys.get(id(fields))
+
+def _get_schema(fields):
+    '''Return the shared _Schema for a list of field specifications. The schema keeps a reference to fields, so the id can not be reused by another list while the schema is cached.'''
+    schema = _schemas.get(id(fields)) or _other_schemas.get(id(fields))
+    if schema is None or not schema.fields is fields:
+        schema = _Schema(fields)
+        if _specification_key(fields) is None:
+            _other_schemas[id(fields)] = schema
+        else:
+            _schemas[id(fields)] = schema
+    return schema
+
+
+class _ColumnStore(object):
+    '''The values of the entries of a data category, stored column by column. Each key of the schema has one column, which is a list with one value per entry, or None as long as all of its values are None. DatevEntry objects are views on one row of a store.'''
+    
+    __slots__ = ('schema', 'columns', 'size')
+    
+    def __init__(self, schema, size = 0):
+        self.schema = schema
+        self.columns = [None] * len(schema.keys)
+        self.size = size
+    
+    def get(self, index, row):
+        column = self.columns[index]
+        return None if column is None else column[row]
+    
+    def set(self, index, row, value):
+        column = self.columns[index]
+        if column is None:
+            if value is None:
+                return
+            column = self.columns[index] = [None] * self.size
+        column[row] = value
+    
+    def row(self, row):
+        '''Return the values of one row as a list in the order of self.schema.keys.'''
+        return [None if column is None else column[row] for column in self.columns]
+    
+    def append_row(self):
+        '''Add an empty row and return its index.'''
+        for column in self.columns:
+            if not column is None:
+                column.append(None)
+        self.size += 1
+        return self.size - 1
+    
+    def extend(self, columns, size):
+        '''Add size rows, given as one list of values or None per key, like the result of _Schema.parse_columns().'''
+        for index, values in enumerate(columns):
+            column = self.columns[index]
+            if values is None:
+                if not column is None:
+                    column.extend([None] * size)
+            elif column is None:
+                self.columns[index] = [None] * self.size + values if self.size > 0 else values
+            else:
+                column.extend(values)
+        self.size += size
+    
+    def dense_columns(self):
+        '''Return all columns as lists, with the columns that are None filled with None values.'''
+        return [[None] * self.size if column is None else column for column in self.columns]
+
+
+class DatevEntry(MutableMapping):
     '''A generic class for entries that are part of one of the data categories. The classes for entries of a specific data category should inherit from this class.
-    An instance of this class behaves almost like a dictionary, but instead of arbitrary keys, only specific keys are allowed, and instead of arbitrary datatypes for the values, only specific datatypes are allowed.'''
+    An instance of this class behaves almost like a dictionary, but instead of arbitrary keys, only specific keys are allowed, and instead of arbitrary datatypes for the values, only specific datatypes are allowed.
+    The values are stored in one row of a _ColumnStore. The entries of a data category share the store of the category, an entry that is created on its own has a store with a single row.'''
+    
+    __slots__ = ('_store', '_row')
 
     def __init__(self, fields):
-        super().__init__()
-        self._fields = fields
-        self._labels = [f['Label'] for f in fields]
-        self._aliases = dict([(f['LabelAlias'],f['Label']) for f in fields if ('LabelAlias' in f and not f['LabelAlias'] is None)])
-        self._fields_dict = dict([(field['Label'],field) for field in fields])
-        for field in self._fields:
-            self[field['Label']] = None
+        self._store = _ColumnStore(_get_schema(fields), 1)
+        self._row = 0
+    
+    @classmethod
+    def _view(cls, store, row):
+        '''Create an entry for an existing row of a _ColumnStore.'''
+        entry = cls.__new__(cls)
+        entry._store = store
+        entry._row = row
+        return entry
+    
+    @property
+    def _schema(self):
+        return self._store.schema
+    
+    def copy(self):
+        '''Return a copy of the entry with its own single-row store, so that changing the copy does not change the entry.'''
+        return _entry_from_values(type(self), self._schema.fields, self._store.row(self._row))
+    
+    def __copy__(self):
+        return self.copy()
+    
+    def __deepcopy__(self, memo):
+        return self.copy() #the values are immutable
+    
+    def __reduce__(self):
+        #pickle only the values of this row, not the whole store of the data category, and the fields by their key in the specifications if possible
+        fields = self._schema.fields
+        key = _specification_key(fields)
+        if key is None:
+            return (_entry_from_values, (type(self), fields, self._store.row(self._row)))
+        return (_entry_from_specification, (type(self), key[0], key[1], self._store.row(self._row)))
+    
+    def __getitem__(self, key):
+        store = self._store
+        column = store.columns[store.schema.index[key]]
+        return None if column is None else column[self._row]
+    
+    def __delitem__(self, key):
+        raise KeyError("Removing keys is not allowed.")
+    
+    def popitem(self):
+        raise KeyError("Removing keys is not allowed.")
+    
+    def clear(self):
+        '''Set all values to None. The keys can not be removed, see self.__delitem__().'''
+        row = self._row
+        for column in self._store.columns:
+            if not column is None:
+                column[row] = None
+    
+    def __iter__(self):
+        return iter(self._schema.keys)
+    
+    def __len__(self):
+        return len(self._schema.keys)
+    
+    def __contains__(self, key):
+        return key in self._schema.index
+    
+    def __repr__(self):
+        store = self._store
+        return repr(dict(zip(store.schema.keys, store.row(self._row))))
+    
+    @property
+    def data(self):
+        '''A read-only mapping with the keys and values of the entry, like the data attribute of the UserDict this class was derived from. It is a read-only copy, so writing to it raises a TypeError; to change a value, set it on the entry itself.'''
+        store = self._store
+        return types.MappingProxyType(dict(zip(store.schema.keys, store.row(self._row))))
         
     def __setitem__(self, key, value):
         #check if key is valid
-        if key in self._aliases:
-            key = self._aliases[key]
-        if not key in self._labels:
+        store = self._store
+        info = store.schema.field_info.get(key)
+        if info is None:
             raise KeyError("Adding new keys is not allowed.")
-        #check if datatype of value is valid
-        format_type = self._fields_dict[key]['FormatType']
-        decimal_places = int(self._fields_dict[key]['DecimalPlaces'])
-        if not value is None:
-            if format_type == 'Betrag':
-                if not isinstance(value, float):
-                    raise DatevFormatError("The value for key '{}' needs to be of type float.".format(key))
-            elif format_type == 'Datum':
-                if not type(value) is datetime.date: #Check with type(), because isinstance() would also accept datetime.datetime.
-                    raise DatevFormatError("The value for key '{}' needs to be of type datetime.date.".format(key))
-            elif format_type == 'Datum JJJJMMTT':
-                if not type(value) is datetime.date: #Check with type(), because isinstance() would also accept datetime.datetime.
-                    raise DatevFormatError("The value for key '{}' needs to be of type datetime.date.".format(key))
-            elif format_type == 'Konto':
-                if not isinstance(value, str):
-                    raise DatevFormatError("The value for key '{}' needs to be of type str.".format(key))
-                if not value.isdigit():
-                    raise DatevFormatError("The value for key '{}' needs to be a string of digits.".format(key))
-            elif format_type == 'Text':
-                if not isinstance(value, str):
-                    raise DatevFormatError("The value for key '{}' needs to be of type str.".format(key))
-                if '"' in value:
-                    raise DatevFormatError("The value for key '{}' should not contain quotation marks.".format(key))
-            elif format_type == 'Zahl' and decimal_places == 0:
-                if not isinstance(value, int):
-                    raise DatevFormatError("The value for key '{}' needs to be of type int.".format(key))
-            elif format_type == 'Zahl' and decimal_places > 0:
-                if not isinstance(value, float):
-                    raise DatevFormatError("The value for key '{}' needs to be of type float.".format(key))
-            elif format_type == 'Zeitstempel':
-                if not isinstance(value, datetime.datetime):
-                    raise DatevFormatError("The value for key '{}' needs to be of type datetime.datetime.".format(key))
-            else:
-                raise NotImplementedError("Unknown FormatType: {}".format(format_type))
-        
-        #set value
-        super().__setitem__(key, value)
+        key, index, check = info
+        #check if datatype of value is valid and set value, like in store.set()
+        column = store.columns[index]
+        if value is None:
+            if column is None:
+                return
+        else:
+            check(key, value)
+            if column is None:
+                column = store.columns[index] = [None] * store.size
+        column[self._row] = value
+    
+    def _set_raw(self, key, value):
+        '''Set a value without checking its type. Only for values that are known to be valid, like the constants in Buchungsstapel.__init__().'''
+        key, index, check = self._store.schema.field_info[key]
+        self._store.set(index, self._row, value)
     
     def __str__(self):
         '''Show the date of the entry that is set, but not the fields that are set to None.'''
         s = '{'
-        for label in self._labels:
+        for label in self._schema.labels:
             if self[label] is None:
                 continue
             s += "{}: {}, ".format(label, self[label])
@@ -92,66 +577,25 @@ class DatevEntry(UserDict):
     
     def verify(self):
         '''Check whether all required fields are filled.'''
-        missing = []
-        for field in self._fields:
-            if int(field['Necessary']) == 1:
-                if self[field['Label']] is None:
-                    missing.append(field['Label'])
+        missing = [key for key in self._schema.required_keys if self[key] is None]
         if len(missing) > 0:
             raise DatevFormatError('The following necessary values are missing: ' + str(missing))
         return True
     
     def python2datev(self, key):
         '''Return value in datev format.'''
-        value = self[key]
-        format_type = self._fields_dict[key]['FormatType']
-        length = -1 if self._fields_dict[key]['Length'] is None else int(self._fields_dict[key]['Length'])
-        decimal_places = int(self._fields_dict[key]['DecimalPlaces'])
-        max_length = length + 1 + decimal_places if format_type in ['Betrag','Zahl'] else length
-        
+        key, index, empty, quotes, decimal_places, max_length, write = self._schema.serializer[key]
+        value = self._store.get(index, self._row)
         if value is None:
-            if format_type == 'Text':
-                s = '""'
-            else:
-                s = ''
-        else:
-            if format_type == 'Betrag':
-                s = '{:.{}f}'.format(value, decimal_places).replace('.',',')
-            elif format_type == 'Datum':
-                if length == 4:
-                    s = "{:0>2d}".format(value.day) + "{:0>2d}".format(value.month)
-                elif length == 8:
-                    s = "{:0>2d}".format(value.day) + "{:0>2d}".format(value.month) + "{:0>4d}".format(value.year) 
-                else:
-                    raise NotImplementedError("Unknown date format.")
-            elif format_type == 'Datum JJJJMMTT':
-                s = "{:0>4d}".format(value.year) + "{:0>2d}".format(value.month) + "{:0>2d}".format(value.day)
-                
-            elif format_type == 'Konto':
-                s = value
-                
-            elif format_type == 'Text':
-                 s = '"' + value + '"'
-                
-            elif format_type == 'Zahl':
-                s =  '{:.{}f}'.format(value, decimal_places).replace('.',',')
-            
-            elif format_type == 'Zeitstempel':
-                s = "{:0>4d}{:0>2d}{:0>2d}{:0>2d}{:0>2d}{:0>2d}{:0>3d}".format(value.year,value.month,value.day,value.hour,value.minute,value.second,value.microsecond)
-            
-            else:
-                raise NotImplementedError("Unknown FormatType: {}".format(format_type))
-        
-        if length > 0:
-            if len(s.replace('"','')) > max_length:
-                raise DatevFormatError("The value {} has {} characters, but the DATEV file specification allows only {} characters for values at key {}.".format(s, len(s), max_length, key))
-        
+            return empty
+        s = write(value, decimal_places)
+        if max_length >= 0 and len(s) - quotes > max_length: #Text values are quoted and can not contain further quotation marks
+            raise DatevFormatError("The value {} has {} characters, but the DATEV file specification allows only {} characters for values at key {}.".format(s, len(s), max_length, key))
         return s
 
     def serialize(self):
         '''Convert data to a string as it is represented in a DATEV file. For the inverse operation, see self.parse().'''
-        parts = [self.python2datev(field['Label']) for field in self._fields]
-        return ';'.join(parts)
+        return self._schema.serialize_values(self._store.row(self._row))
     
     def datev2python(self, key, string, year = None):
         '''Parse a string containing a single datum from a DATEV-file and save the content as a python datatype in self[key].
@@ -162,37 +606,13 @@ class DatevEntry(UserDict):
         string: str, a single datum from a DATEV file  
         year:   int, only required if the string contains a date
         '''
-        format_type = self._fields_dict[key]['FormatType']
-        length = -1 if self._fields_dict[key]['Length'] is None else int(self._fields_dict[key]['Length'])
-        decimal_places = int(self._fields_dict[key]['DecimalPlaces'])
-        max_length = length + 1 + decimal_places if format_type in ['Betrag','Zahl'] else length
-        
+        key, index, check, read = self._schema.parser[key]
         if len(string) == 0 or string == '""':
             value = None
-        elif format_type == 'Betrag':
-            value = float(string.replace(',', '.')) 
-        elif format_type == 'Datum':
-            if length == 8 and ('FormatExpression' in self._fields_dict[key]) and (self._fields_dict[key]['FormatExpression'] == 'TTMM'):
-                value = datetime.date(year, int(string[2:4]), int(string[0:2]))
-            elif length == 8 and len(string) == 8:
-                value = datetime.date(int(string[4:8]), int(string[2:4]), int(string[0:2]))  
-            else:
-                raise NotImplementedError("Unknown date format.")
-        elif format_type == 'Datum JJJJMMTT':
-            value = datetime.date(int(string[0:4]), int(string[4:6]), int(string[6:8]))  
-        elif format_type == 'Konto':
-            value = string
-        elif format_type == 'Text':
-            value = string.replace('"','')
-        elif format_type == 'Zahl':
-            if decimal_places == 0:
-                value = int(string)
-            elif decimal_places > 0:
-                value = float(string.replace(',', '.')) 
-        elif format_type == 'Zeitstempel':
-            t = string
-            value = datetime.datetime(int(t[:4]),int(t[4:6]),int(t[6:8]),int(t[8:10]),int(t[10:12]),int(t[12:14]),int(t[14:17]))
-        self[key] = value
+        else:
+            value = read(string, year)
+            check(key, value)
+        self._store.set(index, self._row, value)
     
     def parse(self, line, year = None):
         '''Read a string of one line from a DATEV file, convert the content to python datatypes and store the results. For the inverse operation, see self.serialize().
@@ -202,20 +622,53 @@ class DatevEntry(UserDict):
         line:   str
         year:   int
         '''
-        values = line.split(';')
-        if len(values) < len(self._labels):
-            raise IOError("Unable to parse line: " + line)
-        elif len(values) > len(self._labels):
-            ignore = values[len(self._labels):]
-            values = values[:len(self._labels)]
+        self.parse_values(line.split(';'), year)
+    
+    def parse_values(self, values, year = None):
+        '''Convert the already separated strings of one line from a DATEV file to python datatypes and store the results.
+        
+        Parameters
+        ----------
+        values: list of str
+        year:   int
+        '''
+        parsers = self._schema.parsers
+        if len(values) < len(parsers):
+            raise IOError("Unable to parse line: " + ';'.join(values))
+        elif len(values) > len(parsers):
+            ignore = values[len(parsers):]
+            values = values[:len(parsers)]
             print("Warning: A line in the datev file has more columns than expected. The following columns are ignored: " + str(ignore))
-        for field,value in zip(self._fields, values):
-            self.datev2python(field['Label'], value, year)
+        store, row = self._store, self._row
+        for (key, index, check, read), string in zip(parsers, values):
+            if len(string) == 0 or string == '""':
+                store.set(index, row, None)
+            else:
+                value = read(string, year)
+                check(key, value)
+                store.set(index, row, value)
     
     @property
     def required_keys(self):
-        return [field['Label'] for field in self._fields if int(field['Necessary']) == 1]
+        return list(self._schema.required_keys)
+
+
+def _entry_from_values(cls, fields, values):
+    '''Create an entry of class cls with a single-row store from a list of values in the order of the keys of the schema, see DatevEntry.copy() and DatevEntry.__reduce__().'''
+    store = _ColumnStore(_get_schema(fields), 1)
+    store.columns = [None if value is None else [value] for value in values]
+    return cls._view(store, 0)
+
+def _entry_from_specification(cls, category_type, version, values):
+    '''Like _entry_from_values(), with the fields of a data category in the specifications, see DatevEntry.__reduce__().'''
+    return _entry_from_values(cls, get_specifications()[category_type][version]['Field'], values)
+
+
+#marks the end of each line for pandas.read_csv in DatevDataCategory.load_fast(), it can not occur in DATEV files
+_line_end = '\x1f'
 
+#stored in the signature of the caches of DatevDataCategory.load_fast(), needs to be increased whenever the DataFrame of load_fast() changes
+_cache_format_version = 2
 
 
 class DatevDataCategory(object):
@@ -224,12 +677,15 @@ class DatevDataCategory(object):
     def __init__(self, category_type, version):
         self._category_type = category_type
         self._version = str(version)
+        specifications = get_specifications()
         if not category_type in specifications:
             raise ValueError("Unknown category_type: " + category_type)
         if not self._version in specifications[category_type]:
             raise ValueError("Version {} unknown for category {}".format(self._version, category_type))
+        self._fields = specifications[category_type][self._version]['Field']
         self._metadata = DatevEntry(specifications['Metadaten']['Andere']['Field'])
         self._data = []
+        self._store = _ColumnStore(_get_schema(self._fields))
         
     def load(self, filename):
         '''Load a datev file.
@@ -239,13 +695,85 @@ class DatevDataCategory(object):
         filename:       string
         '''
         with open(filename, 'r', encoding = 'ISO-8859-1') as f:
-            content = f.read().splitlines()
-        header_line = content[0]
-        column_line = content[1]
-        entry_lines = content[2:]
+            header_line = f.readline().rstrip('\r\n')
+            column_line = f.readline().rstrip('\r\n')
+            #the file is opened with universal newlines, so the lines only need to be split at '\n'. The body is decoded as a whole, because csv.reader only accepts str and decoding ISO-8859-1 takes a few milliseconds.
+            entry_lines = f.read().split('\n')
+        if entry_lines[-1] == '':
+            entry_lines.pop()
         
         self._metadata.parse(header_line)
         self.parse_data(column_line, entry_lines)
+    
+    def load_fast(self, filename, cache = False):
+        '''Load a datev file and return the data as a pandas DataFrame, without creating entries. The metadata is loaded like with self.load(), self.data is not changed. The result is the same as self.export_as_pandas_dataframe() after self.load(filename), and lines with too few columns raise the same IOError. Lines with more columns than the column line raise the error of pandas.read_csv instead of the warning of self.load().
+        
+        If cache is True, the DataFrame is additionally stored in <filename>.parquet together with the header line in <filename>.parquet.json. This file also stores the data category, the version, the format of the cache and the modification time and size of the file. As long as all of them match, later calls read the DataFrame from there instead of parsing the file again. This requires the python module 'pyarrow'.
+        
+        Parameters
+        ----------
+        filename:       string
+        cache:          bool
+        
+        Returns
+        -------
+        pandas.DataFrame
+        '''
+        if cache:
+            cache_path = filename + '.parquet'
+            signature = ['pydatev load_fast', _cache_format_version, self._category_type, self._version, os.path.getmtime(filename), os.path.getsize(filename)]
+            try:
+                with open(cache_path + '.json', 'r') as f:
+                    cached_signature = json.load(f)['signature']
+            except (IOError, ValueError, KeyError):
+                cached_signature = None
+            if cached_signature == signature and os.path.exists(cache_path):
+                return self.load_parquet(cache_path)
+        _import_pandas()
+        with open(filename, 'r', encoding = 'ISO-8859-1') as f:
+            header_line = f.readline().rstrip('\r\n')
+            body = f.read()
+        #pandas.read_csv fills the missing columns of short lines with empty strings. To find these lines like self.load() does, each line gets one more column with a marker, which ends up in an earlier column if the line is too short.
+        if body.endswith('\n'):
+            body = body[:-1]
+        body = body.replace('\n', ';' + _line_end + '\n') + ';' + _line_end
+        frame = pd.read_csv(io.StringIO(body), sep = ';', header = 0, index_col = False, dtype = str, na_filter = False, quotechar = '"', engine = 'c')
+        self._metadata.parse(header_line)
+        year = self._metadata['Wirtschaftsjahr-Beginn'].year
+        schema = _get_schema(self._fields)
+        n = len(schema.compiled)
+        if frame.shape[1] - 1 < n:
+            raise IOError("Unable to parse data: {} columns found, but {} columns expected.".format(frame.shape[1] - 1, n))
+        complete = (frame.iloc[:,n:] == _line_end).any(axis = 1)
+        if not complete.all():
+            line = body.split('\n')[1 + complete.tolist().index(False)]
+            raise IOError("Unable to parse line: " + line[:-len(_line_end) - 1])
+        #the columns are converted and checked with the same kernels as in self.load()
+        columns = schema.parse_columns([frame.iloc[:,i].tolist() for i in range(n)], year)
+        frame = pd.DataFrame(dict(zip(schema.keys, [[None] * len(frame) if column is None else column for column in columns])))
+        if cache:
+            frame.to_parquet(cache_path, engine = 'pyarrow', compression = 'zstd')
+            with open(cache_path + '.json', 'w') as f:
+                json.dump({'header': header_line, 'signature': signature}, f)
+        return frame
+    
+    def load_parquet(self, filename):
+        '''Load a DataFrame that was cached by self.load_fast(..., cache = True). The metadata is restored from the sidecar file <filename>.json, self.data is not changed.
+        
+        Parameters
+        ----------
+        filename:       string, path of the .parquet file
+        
+        Returns
+        -------
+        pandas.DataFrame
+        '''
+        _import_pandas()
+        with open(filename + '.json', 'r') as f:
+            header_line = json.load(f)['header']
+        frame = pd.read_parquet(filename, engine = 'pyarrow')
+        self._metadata.parse(header_line)
+        return frame
         
     def save(self, filename):
         '''Save data to a Datev file. The Datev file specification require that the filename has the format EXTF_<arbitrary-name>.csv, e.g. EXTF_Buchungsstapel__<date_time>_<export number>.csv .
@@ -257,9 +785,16 @@ class DatevDataCategory(object):
         fn = os.path.split(filename)[1]
         if not fn[:5] == 'EXTF_' or not os.path.splitext(fn)[1] == '.csv':
             raise DatevFormatError("The Datev file specification require that the filename has the format EXTF_<arbitrary-name>.csv, e.g. EXTF_Buchungsstapel__<date_time>_<export number>.csv .")
-        with open(filename, 'w', encoding = 'ISO-8859-1') as f:
-            f.write(self._metadata.serialize() + '\n')
-            f.write(self.serialize_data())
+        #write to a temporary file first, so that an error while serializing does not leave a partly written file in place of an existing one
+        temp_filename = filename + '.tmp'
+        try:
+            with open(temp_filename, 'w', encoding = 'ISO-8859-1') as f:
+                f.write(self._metadata.serialize() + '\n')
+                self.write_data(f)
+            os.replace(temp_filename, filename)
+        finally:
+            if os.path.exists(temp_filename):
+                os.remove(temp_filename)
     
     @property
     def data(self):
@@ -270,47 +805,140 @@ class DatevDataCategory(object):
         return self._metadata
     
     def add_entry(self):
-        new_entry = DatevEntry(specifications[self._category_type][self._version]['Field'])
-        self._data.append(new_entry)
+        data = self.data
+        new_entry = DatevEntry._view(self._store, self._store.append_row())
+        data.append(new_entry)
         return new_entry
     
+    def add_entries(self, records):
+        '''Add one entry for each record. This is faster than calling self.add_entry() and setting the values one by one, because the values are checked and stored column by column.
+        
+        Parameters
+        ----------
+        records:    list of dicts or pandas.DataFrame, with the keys of the entries (labels or aliases) as keys or column names. Missing keys and None or NaN values are left empty. A label and its alias can both be used, but not with values in the same record.
+        
+        Returns
+        -------
+        list of DatevEntry
+        '''
+        data = self.data
+        store = self._store
+        schema = store.schema
+        size = len(records)
+        if isinstance(records, list):
+            keys = dict.fromkeys(key for record in records for key in record)
+            #NaN is the only value that is not equal to itself, it is left empty like in a DataFrame
+            columns_in = [(key, [None if value != value else value for value in [record.get(key) for record in records]]) for key in keys]
+        else:
+            _import_pandas()
+            columns_in = []
+            for key in records.columns:
+                column = records[key]
+                missing = column.isna().tolist()
+                columns_in.append((key, [None if m else v for v, m in zip(column.tolist(), missing)]))
+        columns = [None] * len(schema.keys)
+        sources = {} #index -> key of the values in columns[index]
+        for key, values in columns_in:
+            info = schema.field_info.get(key)
+            if info is None:
+                raise KeyError("Adding new keys is not allowed.")
+            label, index, check = info
+            #equal values of different types, like 10 and 10.0, are checked separately
+            try:
+                distinct = set(zip(map(type, values), values))
+            except TypeError: #unhashable values, check them one by one to get the error of the check function
+                distinct = zip(map(type, values), values)
+            for value_type, value in distinct:
+                if not value is None:
+                    check(label, value)
+            if values.count(None) == size:
+                continue
+            if columns[index] is None:
+                columns[index] = values
+                sources[index] = key
+            else: #a label and its alias, merge their values
+                for i,(v, w) in enumerate(zip(columns[index], values)):
+                    if not v is None and not w is None:
+                        raise DatevFormatError("Record {} has values for both '{}' and '{}', which are the same key.".format(i, sources[index], key))
+                columns[index] = [w if v is None else v for v, w in zip(columns[index], values)]
+        start = store.size
+        store.extend(columns, size)
+        new_entries = [DatevEntry._view(store, row) for row in range(start, start + size)]
+        data.extend(new_entries)
+        return new_entries
+    
     def parse_data(self, column_line, entry_lines):
-        '''Parse the body of a datev file. 
+        '''Parse the body of a datev file. The body is converted column by column into self._store.
         
         Parameters
         ----------
         column_line:    string
         entry_lines:    list of strings
         '''
-        for line in entry_lines:
-            new_entry = self.add_entry()
-            new_entry.parse(line, year = self._metadata['Wirtschaftsjahr-Beginn'].year)
+        year = self._metadata['Wirtschaftsjahr-Beginn'].year
+        rows = list(csv.reader(entry_lines, delimiter = ';', quotechar = '"'))
+        n = len(self._fields)
+        for values in rows:
+            if len(values) < n:
+                raise IOError("Unable to parse line: " + ';'.join(values))
+            elif len(values) > n:
+                print("Warning: A line in the datev file has more columns than expected. The following columns are ignored: " + str(values[n:]))
+        columns = self._store.schema.parse_columns(zip(*rows), year)
+        size = len(rows)
+        start = self._store.size
+        self._store.extend(columns, size)
+        self._data.extend(DatevEntry._view(self._store, row) for row in range(start, start + size))
+    
+    def _data_in_store_order(self):
+        '''Check whether self.data contains exactly the rows of self._store in their order, so that the data can be read from the columns directly.'''
+        data = self.data
+        store = self._store
+        if len(data) != store.size:
+            return False
+        return all(entry._store is store and entry._row == row for row, entry in enumerate(data))
+    
+    def _column(self, key):
+        '''Return the values of key for all entries in self.data as a list.'''
+        if self._data_in_store_order():
+            column = self._store.columns[self._store.schema.index[key]]
+            return [None] * self._store.size if column is None else column
+        return [entry[key] for entry in self.data]
             
     
     def serialize_data(self):
         '''Serialize the data of the body of a datev file. 
         '''
-        lines = []
+        return ''.join(self._serialize_blocks())
+    
+    def write_data(self, f):
+        '''Serialize the data of the body of a datev file like self.serialize_data() and write it to the text file f block by block, without creating the whole text in memory.'''
+        f.writelines(self._serialize_blocks())
+    
+    def _serialize_blocks(self, block_size = 4096):
+        '''Serialize the data of the body of a datev file and yield the result in blocks of block_size lines. The values are converted column by column, unless self.data has been changed apart from self.add_entry().'''
+        entries = self.data
         #header
-        first_entry = self._data[0]
-        lines.append(';'.join(first_entry.keys())) 
+        yield ';'.join(self._store.schema.keys)
         #body
-        for entry in self._data:
-            lines.append(entry.serialize())
-        return '\n'.join(lines)
+        if self._data_in_store_order():
+            store = self._store
+            for i in range(0, len(entries), block_size):
+                columns = [None if column is None else column[i:i+block_size] for column in store.columns]
+                rows = zip(*store.schema.serialize_columns(columns, min(block_size, store.size - i)))
+                yield '\n' + '\n'.join([';'.join(row) for row in rows])
+        else:
+            for i in range(0, len(entries), block_size):
+                yield '\n' + '\n'.join([entry.serialize() for entry in entries[i:i+block_size]])
     
     def export_as_pandas_dataframe(self):
         '''Return data as a pandas DataFrame.'''
-        data = []
-        for entry in self._data:
-            e = []
-            for key in entry.keys():
-                e.append(entry[key])
-            data.append(e)
-        try:   
-            return pd.DataFrame(data, columns = self._data[0].keys())
-        except NameError:
-            raise RuntimeError("You need to install the python module 'pandas' to use this function.")
+        keys = self._store.schema.keys
+        if self._data_in_store_order():
+            columns = self._store.dense_columns()
+        else:
+            columns = zip(*[entry._store.row(entry._row) for entry in self.data]) if len(self.data) > 0 else [[]] * len(keys)
+        _import_pandas()
+        return pd.DataFrame(dict(zip(keys, columns)))
     
     def verify(self):
         '''Check wheter metadata and all entries are valid.'''
@@ -320,12 +948,15 @@ class DatevDataCategory(object):
         try:
             self._metadata.verify()
         except DatevFormatError as dfe:
-            errors.append("Metadata: ", dfe.args[0])
-        for i,entry in enumerate(self._data):
-            try:
-                entry.verify()
-            except DatevFormatError as dfe:
-                errors.append("Entry {}: {}".format(i,dfe.args[0]))
+            errors.append("Metadata: " + dfe.args[0])
+        #check the required fields column by column, like DatevEntry.verify() would do entry by entry
+        missing = {}
+        for key in _get_schema(self._fields).required_keys:
+            for i,value in enumerate(self._column(key)):
+                if value is None:
+                    missing.setdefault(i, []).append(key)
+        for i in sorted(missing):
+            errors.append("Entry {}: The following necessary values are missing: {}".format(i, missing[i]))
         if len(errors) == 0:
             return True
         else:
@@ -352,7 +983,7 @@ class Buchungsstapel(DatevDataCategory):
         version:                int, optional
         '''
         super().__init__("Buchungsstapel", version)
-        self._metadata = DatevEntry(specifications['Metadaten']['Buchungsstapel']['Field'])
+        self._metadata = DatevEntry(get_specifications()['Metadaten']['Buchungsstapel']['Field'])
         if filename is None:
             if not wirtschaftsjahr_beginn <= datum_von < datum_bis < datetime.date(wirtschaftsjahr_beginn.year+1,wirtschaftsjahr_beginn.month,wirtschaftsjahr_beginn.day):
                 raise DatevFormatError("The dates datum_von and datum_bis should be between wirtschaftsjahr_beginn and wirtschaftsjahr_beginn + 1 year.")  
@@ -362,11 +993,11 @@ class Buchungsstapel(DatevDataCategory):
                 raise DatevFormatError("The mandant number needs to be between 1 and 99999.")
             if not 1001 <= berater <= 9999999:
                 raise DatevFormatError("The berater number needs to be between 1001 and 9999999.")
-            self._metadata['DATEV-Format-KZ'] = 'EXTF'
-            self._metadata['Versionsnummer'] = 700
-            self._metadata['Datenkategorie'] = 21
-            self._metadata['Formatname'] = 'Buchungsstapel'
-            self._metadata['Formatversion'] = 9
+            self._metadata._set_raw('DATEV-Format-KZ', 'EXTF')
+            self._metadata._set_raw('Versionsnummer', 700)
+            self._metadata._set_raw('Datenkategorie', 21)
+            self._metadata._set_raw('Formatname', 'Buchungsstapel')
+            self._metadata._set_raw('Formatversion', 9)
             self._metadata['Berater'] = berater
             self._metadata['Mandant'] = mandant
             self._metadata['Wirtschaftsjahr-Beginn'] = wirtschaftsjahr_beginn
@@ -382,9 +1013,21 @@ class Buchungsstapel(DatevDataCategory):
         new_entry['WKZ Umsatz'] = self._metadata['Währungskennzeichen'] #set default value
         return new_entry
     
+    def add_entries(self, records):
+        '''Add one Buchung for each record, see DatevDataCategory.add_entries(). Records without a value for 'WKZ Umsatz' get the Währungskennzeichen of the metadata, like with self.add_entry().'''
+        if len(self.data) + len(records) > 99999:
+            raise DatevFormatError("Datev file specification doesn't allow more than 99999 entries.")
+        new_entries = super().add_entries(records)
+        waehrungskennzeichen = self._metadata['Währungskennzeichen']
+        if not waehrungskennzeichen is None:
+            for entry in new_entries:
+                if entry['WKZ Umsatz'] is None:
+                    entry['WKZ Umsatz'] = waehrungskennzeichen
+        return new_entries
+    
     def add_buchung(self, umsatz = None, soll_haben = None, konto = None, gegenkonto = None, belegdatum = None):
         '''Add Buchung to the batch. All parameters are optional, but required to make the entry valid. If not specified, the entry will be created, but the required fields need to be filled later.'''
-        if len(self._data) == 99999:
+        if len(self.data) == 99999:
             raise DatevFormatError("Datev file specification doesn't allow more than 99999 entries.")
         entry = self.add_entry()
         entry['Umsatz (ohne Soll/Haben-Kz)'] = umsatz
@@ -401,8 +1044,12 @@ class Buchungsstapel(DatevDataCategory):
             super().verify()
         except DatevFormatError as dfe:
             errors.extend(dfe.args[1])
-        for i,entry in enumerate(self._data):
-            if not self._metadata['Datum von'] <= entry['Belegdatum'] <= self._metadata['Datum bis']:
+        datum_von, datum_bis = self._metadata['Datum von'], self._metadata['Datum bis']
+        belegdatum = self._column('Belegdatum')
+        #the entries share their date objects, so each distinct date is compared once
+        outside = set(d for d in set(belegdatum) if not d is None and not datum_von <= d <= datum_bis)
+        for i,d in enumerate(belegdatum):
+            if d in outside:
                 errors.append("The <Belegdatum> of Buchung {} is outside the specified time frame of this Buchungsstapel (from {} to {}).".format(i,str(self._metadata['Datum von']),str(self._metadata['Datum bis'])))
         if len(errors) > 0:
             raise DatevFormatError("Invalid data.", errors)